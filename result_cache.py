@@ -0,0 +1,228 @@
+# Process-wide result cache shared by every dashboard session
+# - LRU eviction under a hard memory cap
+# - cold entries spill to gzip-compressed pickles on disk, oldest files pruned under a disk cap
+# - concurrent identical requests collapse into a single computation
+# - hit/miss counters for monitoring
+import os
+import gzip
+import pickle
+import hashlib
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+try:
+    BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+except NameError:
+    BASE_DIR = os.getcwd()
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MAX_DISK_BYTES = 1024 * 1024 * 1024
+DEFAULT_SPILL_DIR = os.path.join(BASE_DIR, ".result_cache")
+
+
+# Helper function to estimate how much memory a cached value holds
+def estimate_size(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, (tuple, list)):
+        return sum(estimate_size(v) for v in value)
+    if isinstance(value, dict):
+        return sum(estimate_size(v) for v in value.values())
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return 0
+
+
+# Bookkeeping for a computation that other threads may be waiting on
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class ResultCache:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, spill_dir=DEFAULT_SPILL_DIR, max_disk_bytes=DEFAULT_MAX_DISK_BYTES):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (value, size), most recently used last
+        self._bytes = 0
+        self._inflight = {}
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "collapsed": 0, "evictions": 0, "spills": 0}
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    # Return the cached value for key, computing it with compute() at most once across all threads.
+    # Results for which cacheable(value) is false are handed to waiting threads but not stored.
+    def get_or_compute(self, key, compute, cacheable=None):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return self._entries[key][0]
+            flight = self._inflight.get(key)
+            if flight is not None:
+                self._stats["collapsed"] += 1
+                leader = False
+            else:
+                flight = self._inflight[key] = _Flight()
+                leader = True
+
+        if not leader:
+            flight.done.wait()
+            if isinstance(flight.error, Exception):
+                raise flight.error
+            if flight.error is not None:
+                # The leader was interrupted (e.g. its session stopped), so try again ourselves
+                return self.get_or_compute(key, compute, cacheable)
+            return flight.value
+
+        try:
+            value = self._load_spilled(key)
+            if value is not None:
+                with self._lock:
+                    self._stats["disk_hits"] += 1
+                # Drop the disk copy only once the entry is back in memory; oversized entries stay on disk
+                if self._store(key, value):
+                    self._remove_spilled(key)
+            else:
+                with self._lock:
+                    self._stats["misses"] += 1
+                value = compute()
+                if cacheable is None or cacheable(value):
+                    self._store(key, value)
+            flight.value = value
+            return value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["memory_bytes"] = self._bytes
+            stats["max_bytes"] = self.max_bytes
+        # Collapsed requests were served without computing, so they count as hits
+        served = stats["hits"] + stats["disk_hits"] + stats["collapsed"]
+        lookups = served + stats["misses"]
+        stats["hit_rate"] = served / lookups if lookups else 0.0
+        return stats
+
+    # Drop everything from memory and disk
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            if self.spill_dir and os.path.isdir(self.spill_dir):
+                for name in os.listdir(self.spill_dir):
+                    if name.endswith(".pkl.gz") or name.endswith(".tmp"):
+                        os.remove(os.path.join(self.spill_dir, name))
+
+    def _spill_path(self, key):
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.spill_dir, f"{digest}.pkl.gz")
+
+    def _load_spilled(self, key):
+        if not self.spill_dir:
+            return None
+        path = self._spill_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with gzip.open(path, "rb") as f:
+                stored_key, value = pickle.load(f)
+        except Exception:
+            return None
+        if stored_key != key:
+            return None
+        return value
+
+    def _remove_spilled(self, key):
+        try:
+            os.remove(self._spill_path(key))
+        except OSError:
+            pass
+
+    def _write_spill(self, key, value):
+        path = self._spill_path(key)
+        if os.path.exists(path):
+            return False
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with gzip.open(tmp_path, "wb", compresslevel=3) as f:
+                pickle.dump((key, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        self._prune_spill_dir()
+        return True
+
+    # Delete the oldest spill files until the folder is back under the disk cap
+    def _prune_spill_dir(self):
+        if not self.max_disk_bytes:
+            return
+        files = []
+        for name in os.listdir(self.spill_dir):
+            if not name.endswith(".pkl.gz"):
+                continue
+            path = os.path.join(self.spill_dir, name)
+            try:
+                info = os.stat(path)
+            except OSError:
+                continue
+            files.append((info.st_mtime, info.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+    # Put value in memory, spilling whatever no longer fits; returns False if value itself went to disk
+    def _store(self, key, value):
+        size = estimate_size(value)
+        evicted = []
+        with self._lock:
+            in_memory = size <= self.max_bytes
+            if in_memory:
+                self._entries[key] = (value, size)
+                self._bytes += size
+            else:
+                evicted.append((key, value))
+            # Evict least recently used entries until back under the cap
+            while self._bytes > self.max_bytes and self._entries:
+                old_key, (old_value, old_size) = self._entries.popitem(last=False)
+                self._bytes -= old_size
+                self._stats["evictions"] += 1
+                evicted.append((old_key, old_value))
+
+        # Disk writes happen outside the lock so other sessions are not blocked
+        if self.spill_dir:
+            for old_key, old_value in evicted:
+                try:
+                    written = self._write_spill(old_key, old_value)
+                except Exception:
+                    written = False
+                if written:
+                    with self._lock:
+                        self._stats["spills"] += 1
+        return in_memory
@@ -0,0 +1,214 @@
+# Universe-wide crossover screener
+# Reads only the last (long_window + k) bars of each ticker from the local CSV store
+# and evaluates the strategy rules in one vectorized pass over the whole panel.
+import os
+import glob
+import argparse
+import time
+from io import StringIO
+
+import numpy as np
+import pandas as pd
+
+try:
+    BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+except NameError:
+    BASE_DIR = os.getcwd()
+
+STRATEGIES = ["SMA Crossover", "Golden/Death Cross", "Momentum", "EMA Crossover"]
+MOMENTUM_PERIODS = 10
+DEFAULT_EXTRA_BARS = 60
+EMA_WARMUP_SPANS = 8  # after 8 spans the seed bar keeps ~1e-7 of the EMA weight
+
+
+# Helper function to locate the newest results_YYYYMMDD folder written by sma_backtest.py
+def default_store_dir():
+    candidates = sorted(glob.glob(os.path.join(BASE_DIR, "results_*")))
+    candidates = [c for c in candidates if os.path.isdir(c)]
+    return candidates[-1] if candidates else os.path.join(BASE_DIR, "results")
+
+
+# Helper function to map a CSV file in the store to its ticker symbol
+def ticker_from_path(path):
+    name = os.path.splitext(os.path.basename(path))[0]
+    return name[:-len("_trades")] if name.endswith("_trades") else name
+
+
+# Helper function to read the header plus the last n rows of a CSV without parsing the whole file
+def read_tail(path, n, block_size=8192):
+    with open(path, "rb") as f:
+        header = f.readline()
+        header_end = f.tell()
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        buf = b""
+        # n rows need n newlines, plus one more in case the file does not end with one
+        while pos > header_end and buf.count(b"\n") <= n:
+            step = min(block_size, pos - header_end)
+            pos -= step
+            f.seek(pos)
+            buf = f.read(step) + buf
+    lines = buf.splitlines()
+    if pos > header_end:
+        lines = lines[1:]  # first line may be cut in the middle
+    lines = [line for line in lines if line.strip()][-n:]
+    text = (header + b"\n".join(lines)).decode("utf-8-sig")
+    return pd.read_csv(StringIO(text))
+
+
+# Helper function to load the tail of every ticker into a Close panel aligned on the latest bar
+def load_close_panel(store_dir, bars, tickers=None):
+    paths = sorted(glob.glob(os.path.join(store_dir, "*.csv")))
+    if tickers:
+        wanted = set(tickers)
+        paths = [p for p in paths if ticker_from_path(p) in wanted]
+
+    columns = {}
+    last_dates = {}
+    for path in paths:
+        ticker = ticker_from_path(path)
+        try:
+            df = read_tail(path, bars)
+        except Exception:
+            continue
+        if "Close" not in df.columns or df.empty:
+            continue
+        close = pd.to_numeric(df["Close"], errors="coerce").to_numpy(dtype=float)
+        # Right-align so row -1 is each ticker's most recent bar, shorter histories are padded with NaN
+        padded = np.full(bars, np.nan)
+        padded[bars - len(close):] = close
+        columns[ticker] = padded
+        date_col = "Date" if "Date" in df.columns else df.columns[0]
+        last_dates[ticker] = df[date_col].iloc[-1]
+
+    panel = pd.DataFrame(columns, index=pd.RangeIndex(bars))
+    return panel, pd.Series(last_dates, dtype=object)
+
+
+# Helper function to compute the fast-minus-slow spread for every ticker at once
+def compute_spread(panel, strategy, short_window, long_window):
+    if strategy in ("SMA Crossover", "Golden/Death Cross"):
+        fast = panel.rolling(window=short_window).mean()
+        slow = panel.rolling(window=long_window).mean()
+        return fast - slow
+    if strategy == "EMA Crossover":
+        fast = panel.ewm(span=short_window, adjust=False).mean()
+        slow = panel.ewm(span=long_window, adjust=False).mean()
+        spread = fast - slow
+        # The EMA is seeded at the first bar read. When the file was cut (row 0 holds data),
+        # wait EMA_WARMUP_SPANS long spans before trusting it; a full history only needs the SMA warm-up.
+        seen = panel.notna().cumsum()
+        truncated = panel.iloc[0].notna()
+        warmup = np.where(truncated, EMA_WARMUP_SPANS * long_window, long_window)
+        return spread.where(seen >= warmup)
+    if strategy == "Momentum":
+        # Scaled by price so that spread / Close is the momentum itself
+        return panel.pct_change(periods=MOMENTUM_PERIODS, fill_method=None) * panel
+    raise ValueError(f"Unknown strategy: {strategy}")
+
+
+# Helper function to pick how many bars to read per ticker for a strategy
+def bars_needed(strategy, long_window, extra_bars=DEFAULT_EXTRA_BARS):
+    if strategy == "EMA Crossover":
+        # The EMA restarts at the first tail bar, so read enough history for the seed to fade out
+        return EMA_WARMUP_SPANS * long_window + extra_bars
+    return long_window + extra_bars
+
+
+# Main screening routine: one vectorized pass over the panel
+def screen(panel, strategy="SMA Crossover", short_window=20, long_window=60, last_dates=None):
+    spread = compute_spread(panel, strategy, short_window, long_window)
+    state = np.sign(spread)
+
+    values = state.to_numpy()
+    n = len(values)
+    valid = ~np.isnan(values)
+    prev = np.vstack([np.full((1, values.shape[1]), np.nan), values[:-1]])
+    changed = valid & (values != prev)
+
+    # Streak = bars since the state last changed (counting the current bar)
+    last_change = n - 1 - np.argmax(changed[::-1], axis=0)
+    streak = np.where(changed.any(axis=0), n - last_change, 0)
+    # When the only change is the first valid bar of a truncated tail, the real streak started earlier
+    first_valid = np.argmax(valid, axis=0)
+    truncated = ~np.isnan(panel.to_numpy()[0])
+    streak_capped = truncated & valid.any(axis=0) & (last_change == first_valid)
+    latest = values[-1]
+    # A crossover only counts when the previous bar already had a valid state
+    cross_today = changed[-1] & valid[-2] if n > 1 else np.zeros(values.shape[1], bool)
+    if last_dates is not None:
+        # Rows are aligned by position, so a ticker whose data ends early is not a fresh crossover
+        dates = pd.to_datetime(last_dates.reindex(panel.columns), errors="coerce")
+        cross_today = cross_today & (dates == dates.max()).to_numpy()
+    if strategy == "Golden/Death Cross":
+        # Same rule as the backtest: the signal is only set on the bar where the SMAs cross
+        latest = np.where(cross_today | np.isnan(latest), latest, 0)
+
+    last_close = panel.to_numpy()[-1]
+    distance = spread.to_numpy()[-1] / last_close * 100
+
+    result = pd.DataFrame({
+        "Signal": latest,
+        "New Crossover": cross_today,
+        "Distance (%)": distance,
+        "Streak (bars)": streak,
+        "Streak Capped": streak_capped,
+        "Close": last_close,
+    }, index=panel.columns)
+    result.index.name = "Ticker"
+    result = result.dropna(subset=["Signal"])
+    result["Signal"] = result["Signal"].astype(int)
+    result["Direction"] = np.where(result["Signal"] > 0, "Bullish", np.where(result["Signal"] < 0, "Bearish", "Flat"))
+
+    # Rank: fresh crossovers first, then the names closest to crossing
+    result["_abs_distance"] = result["Distance (%)"].abs()
+    result = result.sort_values(["New Crossover", "_abs_distance"], ascending=[False, True])
+    return result.drop(columns="_abs_distance")
+
+
+# Convenience wrapper used by the CLI and the dashboard tab
+def run_screener(store_dir=None, strategy="SMA Crossover", short_window=20, long_window=60,
+                 extra_bars=DEFAULT_EXTRA_BARS, tickers=None):
+    store_dir = store_dir or default_store_dir()
+    bars = bars_needed(strategy, long_window, extra_bars)
+    panel, last_dates = load_close_panel(store_dir, bars, tickers=tickers)
+    if panel.empty:
+        return pd.DataFrame()
+    result = screen(panel, strategy, short_window, long_window, last_dates=last_dates)
+    result.insert(0, "Last Date", last_dates.reindex(result.index))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scan the local price store for fresh SMA/EMA/momentum signals.")
+    parser.add_argument("--store", default=None, help="Folder of per-ticker CSVs with Date/Close columns (default: newest results_* folder)")
+    parser.add_argument("--strategy", choices=STRATEGIES, default="SMA Crossover")
+    parser.add_argument("--short", type=int, default=20, help="Short window (SMA1/EMA1)")
+    parser.add_argument("--long", type=int, default=60, help="Long window (SMA2/EMA2)")
+    parser.add_argument("--extra-bars", type=int, default=DEFAULT_EXTRA_BARS, help="Bars read beyond the long window; EMA reads at least 4x the long window since it is warm-started from the tail")
+    parser.add_argument("--tickers", default="", help="Optional comma separated subset, e.g. 2330.TW,2317.TW")
+    parser.add_argument("--only-new", action="store_true", help="Show only tickers that crossed on the latest bar")
+    parser.add_argument("--top", type=int, default=50, help="Number of rows to print")
+    parser.add_argument("--output", default=None, help="Optional CSV path for the full result")
+    args = parser.parse_args()
+
+    tickers = [t.strip() for t in args.tickers.split(",") if t.strip()] or None
+    started = time.perf_counter()
+    result = run_screener(args.store, args.strategy, args.short, args.long, args.extra_bars, tickers)
+    elapsed = time.perf_counter() - started
+
+    if result.empty:
+        print("No usable data found in the store.")
+        return
+    if args.only_new:
+        result = result[result["New Crossover"]]
+    if args.output:
+        result.to_csv(args.output, encoding="utf-8-sig")
+        print("Saved screener result:", args.output)
+
+    print(result.head(args.top).to_string(float_format=lambda v: f"{v:.2f}"))
+    print(f"Scanned in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()